@@ -1,13 +1,14 @@
 # research_agent/bot.py
 import os
+import asyncio
 from dotenv import load_dotenv
 import streamlit as st
-from phi.agent import Agent, RunResponse
-from phi.tools.duckduckgo import DuckDuckGo
-from phi.model.groq import Groq
-import requests  # Import requests for fetching news articles
-# Import the fetch_trending_articles function
-from news import fetch_trending_articles
+# phi, news and the semantic cache pull in heavy dependencies, so they are imported
+# lazily inside the functions that use them to keep the first page render fast
+from semantic_cache import DEFAULT_THRESHOLD
+from single_flight import single_flight, make_key
+from persistent_cache import persistent_cache
+from ideas import parse_ideas, build_posts
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,17 +22,36 @@ if not GROQ_API_KEY:
 if not NEWS_API_KEY:
     raise ValueError("Missing required News API key. Please check your .env file.")
 
-# Initialize Groq model
-groq_model = Groq(
-    id="llama-3.3-70b-versatile",
-    api_key=GROQ_API_KEY
-)
+# Groq settings shared by every agent. The Groq model object itself carries run state (tools,
+# session id, function call stack, metrics), so every agent gets its own instance.
+GROQ_MODEL_ID = "llama-3.3-70b-versatile"
+
+# temperature=None uses Groq's default; the semantic cache only reuses responses at temperature 0
+def create_groq_model(temperature=None):
+    from phi.model.groq import Groq
+
+    return Groq(
+        id=GROQ_MODEL_ID,
+        api_key=GROQ_API_KEY,
+        temperature=temperature
+    )
+
+# Load the embedding model and FAISS index once per process
+@st.cache_resource
+def get_semantic_cache():
+    from semantic_cache import SemanticCache
+
+    return SemanticCache()
+
+# Agents and their Groq model keep per-run state, so fresh ones are built for every run
+def create_search_agent(temperature=None):
+    from phi.agent import Agent
+    from phi.tools.duckduckgo import DuckDuckGo
 
-def create_search_agent():
     # DuckDuckGo Agent with news functionality
     ddg_agent = Agent(
         tools=[DuckDuckGo()],
-        model=groq_model,
+        model=create_groq_model(temperature),
         markdown=True,
         description="You are a search agent that helps users find information and news using DuckDuckGo.",
         instructions=[
@@ -45,105 +65,173 @@ def create_search_agent():
     
     return ddg_agent
 
-def search_with_agent(agent, keyword) -> list:
+# Keys of a normalized search result and their defaults
+_RESULT_DEFAULTS = (('title', 'No title'), ('link', ''), ('snippet', ''))
+
+def _normalize(item) -> dict:
+    get = item.get
+    return {key: get(key, default) for key, default in _RESULT_DEFAULTS}
+
+def parse_search_results(content) -> list:
+    match content:
+        # A string is a direct response, no per-item work needed
+        case str():
+            return [{'title': 'Search Result', 'link': '', 'snippet': content}]
+
+        # A dictionary with results
+        case {'results': items}:
+            return [_normalize(item) for item in items]
+
+        # A list of results
+        case list():
+            return [_normalize(item) for item in content]
+
+        case _:
+            return [{'title': 'Search Result', 'link': '', 'snippet': str(content)}]
+
+# LLM responses depend on the model, so it is part of the disk cache key
+# (the temperature is already a cached function argument)
+def _llm_key_fields():
+    return {"model_id": GROQ_MODEL_ID}
+
+# Cached on keyword + max_results + temperature; the leading underscore keeps the threshold out of the key
+@st.cache_data(ttl=3600, show_spinner=False)
+@persistent_cache(ttl=3600, key_extra=_llm_key_fields)
+def cached_search(keyword, max_results, temperature=None, _threshold=DEFAULT_THRESHOLD) -> list:
+    agent = create_search_agent(temperature)
+    prompt = f"Find detailed information and news about: {keyword}"
+    content = get_semantic_cache().get_or_compute(
+        "search",
+        agent.model.id,
+        prompt,
+        keyword,
+        lambda: agent.run(prompt).content,
+        ttl=3600,
+        threshold=_threshold,
+        temperature=temperature
+    )
+    return parse_search_results(content)[:max_results]
+
+async def search_with_agent_async(keyword, max_results=10, temperature=None, threshold=DEFAULT_THRESHOLD) -> list:
+    # Identical searches in flight (from any session) share a single agent run
+    key = make_key("search", keyword, max_results, GROQ_MODEL_ID, temperature)
+    return await single_flight(key, lambda: asyncio.to_thread(cached_search, keyword, max_results, temperature, threshold))
+
+async def _search_async(keyword, max_results, temperature, threshold, status) -> list:
     try:
-        run: RunResponse = agent.run(f"Find detailed information and news about: {keyword}")
-        
-        # Check if run.content is a string (direct response)
-        if isinstance(run.content, str):
-            return [{
-                'title': 'Search Result',
-                'link': '',
-                'snippet': run.content
-            }]
-        
-        # If it's a dictionary with results
-        elif isinstance(run.content, dict) and 'results' in run.content:
-            return [{
-                'title': item.get('title', 'No title'),
-                'link': item.get('link', ''),
-                'snippet': item.get('snippet', '')
-            } for item in run.content['results']]
-        
-        # If it's a list of results
-        elif isinstance(run.content, list):
-            return [{
-                'title': item.get('title', 'No title'),
-                'link': item.get('link', ''),
-                'snippet': item.get('snippet', '')
-            } for item in run.content]
-        
-        else:
-            return [{
-                'title': 'Search Result',
-                'link': '',
-                'snippet': str(run.content)
-            }]
-            
+        results = await search_with_agent_async(keyword, max_results, temperature, threshold)
     except Exception as e:
         st.error(f"Search failed: {str(e)}")
+        status.update(label=f"Search failed for: {keyword}", state="error")
         return []
+    status.update(label=f"Search completed for: {keyword}", state="complete")
+    return results
 
-def generate_content_ideas(keywords):
-    try:
-        content_agent = Agent(
-            model=groq_model,
-            markdown=True,
-            description="You are a creative content idea generator.",
-            instructions=[
-                "Generate engaging and creative content ideas based on keywords.",
-                "Format the output in clear markdown.",
-                "Be specific and actionable in your suggestions."
-            ]
-        )
-        
-        prompt = f"""Given these keywords: {', '.join(keywords)}
-        Generate 5 content ideas that would be interesting and engaging.
-        For each idea, provide:
-        1. A catchy title
-        2. A brief description
-        3. At least 3 key points to cover
-        
-        Format the output in markdown."""
-        
-        run: RunResponse = content_agent.run(prompt)
-        content_ideas = run.content
-        
-        # Generate LinkedIn post format based on content ideas
-        linkedin_posts = []
-        facebook_posts = []  # New list for Facebook posts
-        for idea in content_ideas.split('\n\n'):  # Assuming each idea is separated by two newlines
-            lines = idea.split('\n')
-            title = lines[0]  # First line is the title
-            description = lines[1]  # Second line is the description
-            
-            # Extract key points from the remaining lines
-            key_points = "\n".join(lines[2:5])  # Assuming the next lines are key points
-            
-            # Create structured LinkedIn post
-            hook_line = f"🚀 *{title}* - Grab attention with this hook!"
-            interest_peak = "🔍 Let's dive deeper into this topic!"
-            body = f"{description}\n\n*Key Points to Cover:*\n{key_points}\n\nThis is where you expand on the idea and provide valuable insights."
-            cta = "👉 What are your thoughts? Share in the comments!"
-            hashtags = "#ContentIdeas #LinkedIn #Engagement"
-            
-            linkedin_post = f"{hook_line}\n\n{interest_peak}\n\n{body}\n\n{cta}\n\n{hashtags}"
-            linkedin_posts.append(linkedin_post)
+async def search_all_keywords(keywords, max_results, temperature, threshold, statuses) -> list:
+    return await asyncio.gather(*[
+        _search_async(keyword, max_results, temperature, threshold, status) for keyword, status in zip(keywords, statuses)
+    ])
 
-            # Create structured Facebook post with a different style
-            facebook_post = f"🌟 *{title}*\n\n{description}\n\n*Key Points:*\n{key_points}\n\n💬 We want to hear from you! What do you think about this topic? Share your thoughts in the comments below!\n\n#Facebook #Community #Engagement"
-            facebook_posts.append(facebook_post)
-        
-        return content_ideas, linkedin_posts, facebook_posts  # Return content ideas, LinkedIn posts, and Facebook posts
+def create_content_agent(temperature=None):
+    from phi.agent import Agent
+
+    content_agent = Agent(
+        model=create_groq_model(temperature),
+        markdown=True,
+        description="You are a creative content idea generator.",
+        instructions=[
+            "Generate engaging and creative content ideas based on keywords.",
+            "Format the output in clear markdown.",
+            "Be specific and actionable in your suggestions."
+        ]
+    )
+
+    return content_agent
+
+# Stream the content ideas into the placeholder as they are generated
+def stream_content_ideas(prompt, placeholder, temperature=None) -> str:
+    from phi.agent import RunResponse
+
+    content_agent = create_content_agent(temperature)
+
+    full_response = ""
+    for chunk in content_agent.run(prompt, stream=True):
+        if isinstance(chunk, RunResponse) and isinstance(chunk.content, str):
+            full_response += chunk.content
+            placeholder.markdown(full_response)
+    return full_response
+
+@persistent_cache(ttl=86400, key_extra=_llm_key_fields)
+def cached_content_ideas(prompt, query, temperature=None, _threshold=DEFAULT_THRESHOLD, _placeholder=None) -> str:
+    return get_semantic_cache().get_or_compute(
+        "content_ideas",
+        GROQ_MODEL_ID,
+        prompt,
+        query,
+        lambda: stream_content_ideas(prompt, _placeholder, temperature),
+        ttl=86400,
+        threshold=_threshold,
+        temperature=temperature
+    )
+
+def generate_content_ideas(keywords, temperature=None, threshold=DEFAULT_THRESHOLD, placeholder=None):
+    placeholder = placeholder or st.empty()
+    query = ', '.join(keywords)
+    prompt = f"""Given these keywords: {query}
+    Generate 5 content ideas that would be interesting and engaging.
+    For each idea, provide:
+    1. A catchy title
+    2. A brief description
+    3. At least 3 key points to cover
+    
+    Format the output in markdown."""
+
+    # Runs inline on the script thread so the streamed chunks can be written to the placeholder.
+    # The disk cache and the semantic cache make repeated keyword sets return immediately.
+    async def compute():
+        return cached_content_ideas(prompt, query, temperature, threshold, placeholder)
+
+    try:
+        key = make_key(prompt, GROQ_MODEL_ID, temperature)
+        content_ideas = asyncio.run(single_flight(key, compute))
+        return content_ideas, parse_ideas(content_ideas)  # Return the markdown and the parsed ideas
     except Exception as e:
         st.error(f"Content generation failed: {str(e)}")
-        return "Failed to generate content ideas.", [], []
+        return "Failed to generate content ideas.", []
 
 def fetch_news_articles(keywords):
-    articles = []
-    for keyword in keywords:
-        articles.extend(fetch_trending_articles(NEWS_API_KEY, [keyword.strip()]))
-    return articles
+    from news import fetch_trending_articles
+
+    # All keywords are fetched with a single NewsAPI OR query
+    try:
+        return fetch_trending_articles(NEWS_API_KEY, [keyword.strip() for keyword in keywords])
+    except Exception as e:
+        st.error(f"News fetch failed: {str(e)}")
+        return []
+
+# Render one editable post. As a fragment, saving an edit reruns only this post rather than
+# the whole script, and the form buffers keystrokes until the post is saved.
+@st.fragment
+def render_post_editor(platform, idx, label):
+    posts = st.session_state["posts"][platform]
+    post = posts[idx]
+    st.markdown(f"### {label} {idx + 1}")
+
+    # Display the post
+    preview = st.empty()
+    preview.markdown(post)
+
+    with st.form(f"{platform}_post_{idx}"):
+        # Create an editable text area for the post
+        edited_post = st.text_area(f"Edit {label} {idx + 1}", value=post, height=200)
+
+        # Button to save the edited post
+        if st.form_submit_button(f"Save Changes for {label} {idx + 1}"):
+            posts[idx] = edited_post  # Update the post with the edited content
+            preview.markdown(edited_post)
+            st.success(f"{label} {idx + 1} updated successfully!")
+
+    st.divider()
 
 # Set up Streamlit page config
 st.set_page_config(
@@ -152,9 +240,6 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize agent
-ddg_agent = create_search_agent()
-
 # Add title and description to the Streamlit app
 st.title("Research Agent")
 st.write("Enter keywords to search for information and news, and generate content ideas.")
@@ -162,6 +247,21 @@ st.write("Enter keywords to search for information and news, and generate conten
 # Create input field for keywords
 keywords_input = st.text_area("Enter keywords (one per line)", height=100)
 max_results = st.slider("Maximum results", min_value=1, max_value=10, value=5)
+deterministic = st.sidebar.checkbox(
+    "Deterministic responses",
+    value=False,
+    help="Run Groq at temperature 0. Responses are less varied, but similar prompts can reuse cached answers."
+)
+temperature = 0 if deterministic else None
+similarity_threshold = st.sidebar.slider(
+    "Semantic cache similarity threshold",
+    min_value=0.80,
+    max_value=1.0,
+    value=DEFAULT_THRESHOLD,
+    step=0.01,
+    help="Reuse a cached Groq response when a previous prompt is at least this similar.",
+    disabled=not deterministic
+)
 
 if st.button("Start Research"):
     if keywords_input:
@@ -171,15 +271,16 @@ if st.button("Start Research"):
             # Create tabs for different results
             search_tab, ideas_tab, news_tab, linkedin_tab, instagram_tab, facebook_tab = st.tabs(["Search Results", "Content Ideas", "News Articles", "LinkedIn Posts", "Instagram Posts", "Facebook Posts"])
             
-            # Perform searches
-            search_results = []
+            # Perform searches for all keywords concurrently, one status container per keyword
+            statuses = []
             for keyword in keywords:
-                with st.status(f"Searching for: {keyword}") as status:
-                    st.write("Searching DuckDuckGo for information and news...")
-                    ddg_results = search_with_agent(ddg_agent, keyword)
-                    search_results.extend(ddg_results[:max_results])
-                    
-                    status.update(label="Search completed!", state="complete")
+                status = st.status(f"Searching for: {keyword}")
+                status.write("Searching DuckDuckGo for information and news...")
+                statuses.append(status)
+
+            search_results = []
+            for ddg_results in asyncio.run(search_all_keywords(keywords, max_results, temperature, similarity_threshold, statuses)):
+                search_results.extend(ddg_results)
 
             # Display search results in the first tab
             with search_tab:
@@ -203,64 +304,27 @@ if st.button("Start Research"):
 
             # Generate and display content ideas in the second tab
             with ideas_tab:
-                content_ideas, linkedin_posts, facebook_posts = generate_content_ideas(keywords)
-                st.markdown(content_ideas)
+                ideas_placeholder = st.empty()
+                content_ideas, ideas = generate_content_ideas(keywords, temperature, similarity_threshold, ideas_placeholder)
+                ideas_placeholder.markdown(content_ideas)
+
+            # Build the posts once and keep them in session state so edits survive fragment reruns
+            st.session_state["posts"] = build_posts(tuple(ideas))
 
             # Display LinkedIn posts in the new LinkedIn tab
             with linkedin_tab:
-                for idx, post in enumerate(linkedin_posts):
-                    st.markdown(f"### LinkedIn Post {idx + 1}")
-                    
-                    # Display the LinkedIn post
-                    st.markdown(post)
-                    
-                    # Create an editable text area for the LinkedIn post
-                    edited_post = st.text_area(f"Edit LinkedIn Post {idx + 1}", value=post, height=200)
-                    
-                    # Button to save the edited post
-                    if st.button(f"Save Changes for Post {idx + 1}"):
-                        linkedin_posts[idx] = edited_post  # Update the post with the edited content
-                        st.success(f"Post {idx + 1} updated successfully!")
-                    
-                    st.divider()
+                for idx in range(len(st.session_state["posts"]["linkedin"])):
+                    render_post_editor("linkedin", idx, "LinkedIn Post")
 
             # New section for Instagram posts
             with instagram_tab:
-                for idx, idea in enumerate(content_ideas.split('\n\n')):  # Assuming each idea is separated by two newlines
-                    lines = idea.split('\n')
-                    title = lines[0]  # First line is the title
-                    description = lines[1]  # Second line is the description
-                    key_points = "\n".join(lines[2:5])  # Assuming the next lines are key points
-
-                    # Create structured Instagram post with a more engaging style
-                    instagram_post = f"✨ *{title}*\n\n{description}\n\n*Key Highlights:*\n{key_points}\n\n📸 Don't forget to tag us in your posts! #Instagram #ContentIdeas #Inspiration"
-                    st.markdown(f"### Instagram Post {idx + 1}")
-                    st.markdown(instagram_post)
-
-                    # Create an editable text area for the Instagram post
-                    edited_instagram_post = st.text_area(f"Edit Instagram Post {idx + 1}", value=instagram_post, height=200)
-
-                    # Button to save the edited post
-                    if st.button(f"Save Changes for Instagram Post {idx + 1}"):
-                        st.success(f"Instagram Post {idx + 1} updated successfully!")
+                for idx in range(len(st.session_state["posts"]["instagram"])):
+                    render_post_editor("instagram", idx, "Instagram Post")
 
             # New section for Facebook posts
             with facebook_tab:
-                for idx, post in enumerate(facebook_posts):
-                    st.markdown(f"### Facebook Post {idx + 1}")
-                    
-                    # Display the Facebook post
-                    st.markdown(post)
-                    
-                    # Create an editable text area for the Facebook post
-                    edited_facebook_post = st.text_area(f"Edit Facebook Post {idx + 1}", value=post, height=200)
-                    
-                    # Button to save the edited post
-                    if st.button(f"Save Changes for Facebook Post {idx + 1}"):
-                        facebook_posts[idx] = edited_facebook_post  # Update the post with the edited content
-                        st.success(f"Facebook Post {idx + 1} updated successfully!")
-                    
-                    st.divider()
+                for idx in range(len(st.session_state["posts"]["facebook"])):
+                    render_post_editor("facebook", idx, "Facebook Post")
 
             # Fetch and display news articles in the third tab
             with news_tab:
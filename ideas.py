@@ -0,0 +1,61 @@
+# research_agent/ideas.py
+from dataclasses import dataclass
+import streamlit as st
+
+@dataclass(slots=True)
+class Idea:
+    title: str
+    description: str
+    key_points: str
+
+# Parse the generated markdown once into a list of ideas
+@st.cache_data(ttl=86400, show_spinner=False)
+def parse_ideas(markdown: str) -> list[Idea]:
+    ideas = []
+    for block in markdown.split('\n\n'):  # Assuming each idea is separated by two newlines
+        lines = block.split('\n')
+        title = lines[0]  # First line is the title
+        description = lines[1] if len(lines) > 1 else ''  # Second line is the description
+        key_points = "\n".join(lines[2:5])  # Assuming the next lines are key points
+        ideas.append(Idea(title, description, key_points))
+    return ideas
+
+# Create structured LinkedIn post
+def format_linkedin_post(idea: Idea) -> str:
+    return "\n\n".join((
+        f"🚀 *{idea.title}* - Grab attention with this hook!",  # Hook line
+        "🔍 Let's dive deeper into this topic!",  # Interest peak
+        idea.description,
+        f"*Key Points to Cover:*\n{idea.key_points}",
+        "This is where you expand on the idea and provide valuable insights.",
+        "👉 What are your thoughts? Share in the comments!",  # Call to action
+        "#ContentIdeas #LinkedIn #Engagement",
+    ))
+
+# Create structured Facebook post with a different style
+def format_facebook_post(idea: Idea) -> str:
+    return "\n\n".join((
+        f"🌟 *{idea.title}*",
+        idea.description,
+        f"*Key Points:*\n{idea.key_points}",
+        "💬 We want to hear from you! What do you think about this topic? Share your thoughts in the comments below!",
+        "#Facebook #Community #Engagement",
+    ))
+
+# Create structured Instagram post with a more engaging style
+def format_instagram_post(idea: Idea) -> str:
+    return "\n\n".join((
+        f"✨ *{idea.title}*",
+        idea.description,
+        f"*Key Highlights:*\n{idea.key_points}",
+        "📸 Don't forget to tag us in your posts! #Instagram #ContentIdeas #Inspiration",
+    ))
+
+# Build the posts for every platform once; the result is cached so reruns don't rebuild them
+@st.cache_data(ttl=86400, show_spinner=False)
+def build_posts(ideas: tuple[Idea, ...]) -> dict[str, list[str]]:
+    return {
+        "linkedin": [format_linkedin_post(idea) for idea in ideas],
+        "instagram": [format_instagram_post(idea) for idea in ideas],
+        "facebook": [format_facebook_post(idea) for idea in ideas],
+    }
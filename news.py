@@ -1,25 +1,152 @@
 # research_agent/news.py
+import asyncio
+import random
+import aiohttp
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import streamlit as st
+from single_flight import single_flight, make_key
+from persistent_cache import persistent_cache
 
-# Function to fetch trending articles based on keywords
-def fetch_trending_articles(api_key, keywords):
-    url = "https://newsapi.org/v2/everything"
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# Raised when NewsAPI doesn't return articles. Raising (rather than returning []) keeps
+# failed fetches out of st.cache_data and the disk cache.
+class NewsAPIError(Exception):
+    pass
+
+# Number of times a rate-limited (429) request is retried
+NEWSAPI_MAX_RETRIES = 3
+# Longest wait (in seconds) before a retry; a longer Retry-After means giving up instead
+NEWSAPI_MAX_RETRY_DELAY = 10
+
+# Shared session so the synchronous path reuses pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    # raise_on_status=False returns the last response once retries run out, instead of raising RetryError.
+    # Retry-After is ignored so a long value can't block the script thread; the short
+    # exponential backoff is used instead, like the capped delay on the aiohttp path.
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+        respect_retry_after_header=False
+    )
+))
+_SESSION.headers.update({"Accept-Encoding": "gzip"})
+
+# Connect and read timeouts in seconds, shared by the requests and aiohttp paths
+NEWSAPI_CONNECT_TIMEOUT = 3.05
+NEWSAPI_READ_TIMEOUT = 10
+
+# Combine keywords into a single NewsAPI query, e.g. "ai" OR "agents".
+# NewsAPI has no escape for a quote inside a quoted phrase, so quotes in a keyword become spaces.
+def build_query(keywords):
+    phrases = (" ".join(keyword.replace('"', ' ').split()) for keyword in keywords)
+    return " OR ".join(f'"{phrase}"' for phrase in phrases if phrase)
+
+# Request enough articles to keep ~5 per keyword when they are fetched in one query
+def _page_size(keywords):
+    return min(100, 5 * len(keywords))
+
+# Build the NewsAPI query parameters
+def _build_params(api_key, query, page_size=5):
+    return {
+        'q': query,  # Search for the keyword(s)
+        'sortBy': 'popularity',  # Sort by popularity
+        'apiKey': api_key,  # Your API key
+        'language': 'en',  # Language of articles
+        'pageSize': page_size # Number of articles to fetch
+    }
+
+# Article fields the app displays
+ARTICLE_FIELDS = ('title', 'description', 'publishedAt', 'url')
+
+# Keep only the article fields the app displays, so the heavy ones (content, urlToImage, ...)
+# are released right after parsing instead of being cached and held in memory
+def _project_articles(data):
     articles = []
+    for article in data.get('articles', []):
+        projected = {field: article[field] for field in ARTICLE_FIELDS if field in article}
+        if 'source' in article:
+            projected['source'] = {'name': article['source'].get('name')} if isinstance(article['source'], dict) else article['source']
+        articles.append(projected)
+    return articles
 
-    for keyword in keywords:
-        params = {
-            'q': keyword,  # Search for the keyword
-            'sortBy': 'popularity',  # Sort by popularity
-            'apiKey': api_key,  # Your API key
-            'language': 'en',  # Language of articles
-            'pageSize': 5 # Number of articles to fetch
-        }
-
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            articles.extend(data.get('articles', []))
-        else:
-            print(f"Error fetching articles for keyword '{keyword}': {response.status_code}")
-
-    return articles
\ No newline at end of file
+# Seconds to wait before retrying a rate-limited request: honour Retry-After if it is
+# larger than the exponential backoff, plus jitter so retries don't arrive together.
+# Returns None when the wait would exceed NEWSAPI_MAX_RETRY_DELAY, since it blocks the script.
+def _retry_delay(response, attempt):
+    delay = 0.5 * 2 ** attempt
+    try:
+        delay = max(delay, float(response.headers.get("Retry-After", 0)))
+    except ValueError:
+        pass
+    if delay > NEWSAPI_MAX_RETRY_DELAY:
+        return None
+    return min(delay + random.uniform(0, delay / 2), NEWSAPI_MAX_RETRY_DELAY)
+
+# Fetch the articles for a single query
+async def _fetch_one(session, api_key, query, page_size=5):
+    params = _build_params(api_key, query, page_size)
+
+    for attempt in range(NEWSAPI_MAX_RETRIES + 1):
+        try:
+            async with session.get(NEWS_API_URL, params=params) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    return _project_articles(data)
+                delay = _retry_delay(response, attempt) if response.status == 429 else None
+                if delay is None or attempt == NEWSAPI_MAX_RETRIES:
+                    raise NewsAPIError(f"Error fetching articles for query '{query}': {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NewsAPIError(f"Error fetching articles for query '{query}': {e}") from e
+
+        await asyncio.sleep(delay)
+
+# Fetch articles for all keywords with one OR query
+async def fetch_trending_articles_async(api_key, keywords):
+    query = build_query(keywords)
+    if not query:
+        return []
+
+    page_size = _page_size(keywords)
+    timeout = aiohttp.ClientTimeout(sock_connect=NEWSAPI_CONNECT_TIMEOUT, sock_read=NEWSAPI_READ_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        # Concurrent requests for the same keyword set share a single NewsAPI call
+        return await single_flight(
+            make_key("news", query, page_size),
+            lambda: _fetch_one(session, api_key, query, page_size)
+        )
+
+# Fetch articles for all keywords with one OR query over the pooled requests session
+def fetch_trending_articles_sync(api_key, keywords):
+    query = build_query(keywords)
+    if not query:
+        return []
+
+    params = _build_params(api_key, query, _page_size(keywords))
+    try:
+        response = _SESSION.get(NEWS_API_URL, params=params, timeout=(NEWSAPI_CONNECT_TIMEOUT, NEWSAPI_READ_TIMEOUT))
+    except requests.RequestException as e:
+        raise NewsAPIError(f"Error fetching articles for query '{query}': {e}") from e
+    if response.status_code == 200:
+        data = orjson.loads(response.content)
+        return _project_articles(data)
+    raise NewsAPIError(f"Error fetching articles for query '{query}': {response.status_code}")
+
+# Function to fetch trending articles based on keywords
+@st.cache_data(ttl=3600, show_spinner=False)
+@persistent_cache(ttl=3600)
+def fetch_trending_articles(api_key, keywords):
+    # asyncio.run can't be used from inside a running event loop, so fall back to the pooled session
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(fetch_trending_articles_async(api_key, keywords))
+    return fetch_trending_articles_sync(api_key, keywords)
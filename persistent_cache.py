@@ -0,0 +1,46 @@
+# research_agent/persistent_cache.py
+import functools
+import hashlib
+import inspect
+import json
+import os
+
+import diskcache
+
+# On-disk tier behind st.cache_data, so results survive process restarts
+cache = diskcache.Cache(os.getenv("RESEARCH_CACHE_DIR", "/tmp/research_cache"), size_limit=2 << 30)
+
+# Marks a cache miss, so a cached None or [] is still a hit
+_MISSING = object()
+
+# Cache a function's return value on disk for ttl seconds.
+# Like st.cache_data, arguments whose name starts with an underscore are not part of the key.
+# key_extra returns additional key fields, e.g. the model id and temperature for LLM calls.
+# Every return value is stored, so decorated functions must signal failure by raising.
+def persistent_cache(ttl=3600, key_extra=None):
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_args = {arg: value for arg, value in bound.arguments.items() if not arg.startswith("_")}
+            if key_extra is not None:
+                key_args.update(key_extra())
+            key = hashlib.sha256(
+                json.dumps({"fn": name, "args": key_args}, sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+
+            result = cache.get(key, default=_MISSING)
+            if result is not _MISSING:
+                return result
+
+            result = func(*args, **kwargs)
+            cache.set(key, result, expire=ttl)
+            return result
+
+        return wrapper
+
+    return decorator
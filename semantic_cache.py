@@ -0,0 +1,166 @@
+# research_agent/semantic_cache.py
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+DEFAULT_THRESHOLD = 0.92
+
+# Normalize a prompt so trivial whitespace/case differences share an exact-match entry
+def normalize_prompt(prompt):
+    return " ".join(prompt.lower().split())
+
+class SemanticCache:
+    """Caches LLM responses and returns them for requests with a similar meaning.
+
+    Exact matches are keyed on the full prompt. For near matches only the
+    variable part of the prompt (the query, e.g. the keywords) is embedded with
+    a sentence-transformer and searched in a FAISS inner-product index; with
+    normalized embeddings the score is the cosine similarity. Entries are kept
+    in a separate index per (namespace, model id), so a response is only reused
+    for the same kind of prompt sent to the same model. Entries are persisted to
+    a pickle file next to the app. Each entry expires after the TTL its caller
+    passes, so responses are refreshed on the same schedule as the outer caches.
+    """
+
+    def __init__(self, path="semantic_cache.pkl", threshold=DEFAULT_THRESHOLD):
+        # Imported here so importing this module (e.g. for DEFAULT_THRESHOLD) stays cheap
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        self.faiss = faiss
+        self.path = path
+        self.threshold = threshold
+        self.model = SentenceTransformer(EMBEDDING_MODEL)
+        self.entries = {}  # entry id -> dict with namespace, model_id, prompt, query, response, vector, created_at
+        self.exact = {}  # (namespace, model_id, normalized prompt) -> entry id
+        self.indexes = {}  # (namespace, model_id) -> (faiss index, entry ids in index order)
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        # A corrupt or half-written file shouldn't take the app down; start with an empty cache
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, OSError):
+            return
+        # Files written before entries were scoped and timestamped can't be reused safely
+        if not isinstance(data, dict) or "entries" not in data:
+            return
+        for entry in data["entries"]:
+            if "created_at" in entry:
+                self._add(entry)
+
+    # Write to a temporary file and swap it in, so readers never see a partially written cache
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".semantic_cache.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({"entries": list(self.entries.values())}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _embed(self, query):
+        return self.model.encode([normalize_prompt(query)], normalize_embeddings=True).astype("float32")
+
+    def _add(self, entry):
+        entry_id = self.next_id
+        self.next_id += 1
+        self.entries[entry_id] = entry
+        self.exact[(entry["namespace"], entry["model_id"], entry["prompt"])] = entry_id
+        scope = (entry["namespace"], entry["model_id"])
+        if scope not in self.indexes:
+            self.indexes[scope] = (self.faiss.IndexFlatIP(EMBEDDING_DIM), [])
+        index, entry_ids = self.indexes[scope]
+        index.add(entry["vector"])
+        entry_ids.append(entry_id)
+
+    # Drop the scope's entries older than ttl seconds; returns True if anything was removed.
+    # IndexFlatIP can't remove vectors cheaply, so the scope's index is rebuilt from what is left.
+    def _evict_expired(self, scope, ttl):
+        if scope not in self.indexes:
+            return False
+        cutoff = time.time() - ttl
+        _, entry_ids = self.indexes[scope]
+        expired = [entry_id for entry_id in entry_ids if self.entries[entry_id]["created_at"] < cutoff]
+        if not expired:
+            return False
+
+        for entry_id in expired:
+            entry = self.entries.pop(entry_id)
+            del self.exact[(entry["namespace"], entry["model_id"], entry["prompt"])]
+        index = self.faiss.IndexFlatIP(EMBEDDING_DIM)
+        remaining = [entry_id for entry_id in entry_ids if entry_id in self.entries]
+        for entry_id in remaining:
+            index.add(self.entries[entry_id]["vector"])
+        if remaining:
+            self.indexes[scope] = (index, remaining)
+        else:
+            del self.indexes[scope]
+        return True
+
+    def get(self, namespace, model_id, prompt, query, ttl, threshold=None):
+        threshold = self.threshold if threshold is None else threshold
+        scope = (namespace, model_id)
+        key = (namespace, model_id, normalize_prompt(prompt))
+        with self.lock:
+            if self._evict_expired(scope, ttl):
+                self._save()
+            if key in self.exact:
+                return self.entries[self.exact[key]]["response"]
+            if scope not in self.indexes:
+                return None
+        vector = self._embed(query)
+        with self.lock:
+            if scope not in self.indexes:
+                return None
+            index, entry_ids = self.indexes[scope]
+            scores, ids = index.search(vector, 1)
+            if scores[0][0] >= threshold:
+                return self.entries[entry_ids[ids[0][0]]]["response"]
+        return None
+
+    def put(self, namespace, model_id, prompt, query, response, ttl):
+        key = (namespace, model_id, normalize_prompt(prompt))
+        vector = self._embed(query)
+        with self.lock:
+            self._evict_expired((namespace, model_id), ttl)
+            if key in self.exact:
+                entry = self.entries[self.exact[key]]
+                entry["response"] = response
+                entry["created_at"] = time.time()
+            else:
+                self._add({
+                    "namespace": namespace,
+                    "model_id": model_id,
+                    "prompt": key[2],
+                    "query": query,
+                    "response": response,
+                    "vector": vector,
+                    "created_at": time.time(),
+                })
+            self._save()
+
+    def get_or_compute(self, namespace, model_id, prompt, query, compute, *, ttl, threshold=None, temperature=None):
+        # Only temperature 0 is deterministic; an unset temperature means the provider default
+        # (1.0 for Groq), so in both cases responses must not be reused
+        if temperature is None or temperature != 0:
+            return compute()
+
+        cached = self.get(namespace, model_id, prompt, query, ttl, threshold)
+        if cached is not None:
+            return cached
+
+        response = compute()
+        self.put(namespace, model_id, prompt, query, response, ttl)
+        return response
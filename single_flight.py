@@ -0,0 +1,57 @@
+# research_agent/single_flight.py
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+
+# Requests currently being computed, keyed by request hash. concurrent.futures.Future
+# is used instead of asyncio.Future so callers on other threads / event loops
+# (e.g. other Streamlit sessions) can wait on the same in-flight request.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Build a stable key from the request parts, e.g. prompt + model + temperature
+def make_key(*parts):
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+# Handed to followers when the leader stopped for a reason that isn't a failure of the request
+# (cancellation, Streamlit rerun/stop), so they run the request themselves instead
+class _LeaderAborted(Exception):
+    pass
+
+def _release(key):
+    with _inflight_lock:
+        del _inflight[key]
+
+# Run coro_factory() once for all concurrent callers that share the same key
+async def single_flight(key, coro_factory):
+    with _inflight_lock:
+        fut = _inflight.get(key)
+        leader = fut is None
+        if leader:
+            fut = Future()
+            _inflight[key] = fut
+
+    if not leader:
+        try:
+            # Shielded so a follower being cancelled doesn't cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(fut))
+        except _LeaderAborted:
+            return await single_flight(key, coro_factory)
+
+    # The key is released before the future completes, so a follower that retries
+    # after _LeaderAborted can't pick up the same finished future again
+    try:
+        result = await coro_factory()
+    except Exception as e:
+        _release(key)
+        fut.set_exception(e)
+        raise
+    except BaseException:
+        # Control-flow exceptions belong to the leader's session only; re-raise them here
+        _release(key)
+        fut.set_exception(_LeaderAborted())
+        raise
+    _release(key)
+    fut.set_result(result)
+    return result